@@ -6,7 +6,16 @@ Communicates with Spring Boot backend via HTTP.
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+from flask.logging import default_handler
 from flask_cors import CORS
+from logging.handlers import QueueHandler, QueueListener
+import numpy as np
+import orjson
+import atexit
+import base64
+import logging
+import queue
 import sys
 import os
 
@@ -15,19 +24,149 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'model-inference'))
 
 from minimax_ai.gomoku_minimax import GomokuMinimaxAI
 
+
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson, used for both request parsing and
+    jsonify responses. Also serializes numpy scalars and arrays natively.
+    """
+
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # the same arguments as jsonify: one value, several as a list, or keywords as a dict
+        if args and kwargs:
+            raise TypeError('app.json.response() takes either args or kwargs, not both')
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = list(args) if args else kwargs or None
+        # hand the encoded bytes straight to the response, no str round trip
+        return self._app.response_class(orjson.dumps(obj, option=self.OPTIONS), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # Enable CORS for backend communication
 
+# Request handlers only enqueue log records; a listener thread formats and
+# writes them to stderr, so a slow log sink never stalls a request
+_log_handler = QueueHandler(queue.SimpleQueue())
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(_log_handler)
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(default_handler.formatter)
+_log_listener = None
+
+
+def start_log_listener() -> None:
+    """Start the thread draining app.logger's queue"""
+    global _log_listener
+    _log_listener = QueueListener(_log_handler.queue, _log_stream)
+    _log_listener.start()
+
+
+def stop_log_listener() -> None:
+    """Write out the records still queued and stop the listener thread"""
+    _log_listener.stop()
+
+
+def restart_log_listener_in_child() -> None:
+    """
+    Threads do not survive fork, so every forked child (e.g. gunicorn workers
+    of a preloaded app) starts its own listener. It needs a new queue too: the
+    parent's listener was blocked reading the old one, which leaves the
+    child's copy unable to wake a reader.
+    """
+    _log_handler.queue = queue.SimpleQueue()
+    start_log_listener()
+
+
+start_log_listener()
+atexit.register(stop_log_listener)
+os.register_at_fork(after_in_child=restart_log_listener_in_child)
+
+# processes for expert's root-parallel search, 0 searches serially
+ROOT_WORKERS = int(os.environ.get('AI_ROOT_WORKERS', '0'))
+
 # Initialize AI instances for each difficulty
 ai_instances = {
     'easy': GomokuMinimaxAI(difficulty='easy'),
     'medium': GomokuMinimaxAI(difficulty='medium'),
     'hard': GomokuMinimaxAI(difficulty='hard'),
-    'expert': GomokuMinimaxAI(difficulty='expert')
+    'expert': GomokuMinimaxAI(difficulty='expert', workers=ROOT_WORKERS)
 }
 
 VERSION = "1.0.0"
 
+BOARD_SIZE = 15
+
+
+def warm_up() -> None:
+    """
+    Search a one-stone board with every difficulty's AI, so the per-size
+    lookup tables (Zobrist keys, neighbourhood and symmetry maps, cell
+    ranks, all lru_cached per process) are built at startup rather than by
+    the first request. The search board, TT and eval cache are per thread,
+    so the ones built here are not reused by request threads.
+
+    AIs with a root-parallel process pool are skipped: the pool would start
+    here, and a pre-forking server must not inherit it.
+    """
+    board = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int8)
+    board[BOARD_SIZE // 2, BOARD_SIZE // 2] = 1
+
+    for ai in ai_instances.values():
+        if ai.workers <= 1:
+            ai.get_move(board, 2)
+
+
+def parse_board(board_state) -> np.ndarray:
+    """
+    Convert a JSON board (nested lists) to a 15x15 int8 array in one pass.
+
+    Raises:
+        ValueError: if the board is not a 15x15 grid of 0, 1 or 2
+    """
+    try:
+        board = np.asarray(board_state)
+    except ValueError:  # ragged rows
+        raise ValueError('board_state must be 15x15 array')
+
+    if board.shape != (BOARD_SIZE, BOARD_SIZE) or board.dtype.kind not in 'iu':
+        raise ValueError('board_state must be 15x15 array')
+    # JSON true/false among ints arrive as 1/0 in an int array, so check the cells themselves
+    if any(type(cell) is bool for row in board_state for cell in row):
+        raise ValueError('board_state values must be 0, 1 or 2')
+    # range check before the cast, which would wrap e.g. 257 to a black stone
+    return check_cells(board).astype(np.int8)
+
+
+def decode_board_b64(encoded: str) -> np.ndarray:
+    """
+    Decode a base64 board: 225 int8 cells in row-major order.
+
+    Raises:
+        ValueError: if the payload is not valid base64 or has the wrong length
+    """
+    raw = base64.b64decode(encoded, validate=True)
+    if len(raw) != BOARD_SIZE * BOARD_SIZE:
+        raise ValueError(f'board_state_b64 must decode to {BOARD_SIZE * BOARD_SIZE} bytes')
+    return check_cells(np.frombuffer(raw, dtype=np.int8).reshape(BOARD_SIZE, BOARD_SIZE))
+
+
+def check_cells(board: np.ndarray) -> np.ndarray:
+    """Reject cells other than 0 (empty), 1 (black) and 2 (white)"""
+    if ((board < 0) | (board > 2)).any():
+        raise ValueError('board_state values must be 0, 1 or 2')
+    return board
+
 
 @app.route('/api/health/', methods=['GET'])
 def health_check():
@@ -57,6 +196,9 @@ def get_ai_move():
         "difficulty": "medium"             // easy, medium, hard, expert
     }
 
+    Instead of board_state, clients may send "board_state_b64": the 225
+    cells as int8 bytes in row-major order, base64 encoded.
+
     Response JSON:
     {
         "row": 7,
@@ -72,22 +214,22 @@ def get_ai_move():
             return jsonify({'error': 'No JSON data provided'}), 400
 
         board_state = data.get('board_state')
+        board_state_b64 = data.get('board_state_b64')
         current_player = data.get('current_player')
         difficulty = data.get('difficulty', 'medium')
 
         # Validate required fields
-        if board_state is None:
+        if board_state is None and board_state_b64 is None:
             return jsonify({'error': 'Missing board_state'}), 400
         if current_player is None:
             return jsonify({'error': 'Missing current_player'}), 400
 
-        # Validate board dimensions
-        if not isinstance(board_state, list) or len(board_state) != 15:
-            return jsonify({'error': 'board_state must be 15x15 array'}), 400
-
-        for row in board_state:
-            if not isinstance(row, list) or len(row) != 15:
-                return jsonify({'error': 'board_state must be 15x15 array'}), 400
+        if board_state_b64 is not None:
+            if not isinstance(board_state_b64, str):
+                return jsonify({'error': 'board_state_b64 must be a base64 string'}), 400
+            board = decode_board_b64(board_state_b64)
+        else:
+            board = parse_board(board_state)
 
         # Validate current_player
         if current_player not in [1, 2]:
@@ -99,7 +241,7 @@ def get_ai_move():
 
         # Get AI move
         ai = ai_instances[difficulty]
-        row, col = ai.get_move(board_state, current_player)
+        row, col = ai.get_move(board, current_player)
 
         app.logger.info(f"AI move calculated: difficulty={difficulty}, player={current_player}, move=({row},{col})")
 
@@ -129,6 +271,9 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 
+warm_up()
+
+
 if __name__ == '__main__':
-    # Development server
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    # Development server; production runs under gunicorn, see gunicorn.conf.py
+    app.run(host='0.0.0.0', port=8000)
@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for the AI service: gunicorn -c gunicorn.conf.py app:app
+
+The minimax search is pure Python and holds the GIL, so throughput comes
+from worker processes; threads only let a worker overlap request I/O.
+With AI_ROOT_WORKERS > 0 every worker starts its own expert search pool,
+so lower WEB_CONCURRENCY to keep the total process count near the core count.
+
+Memory scales with workers * threads: every request thread keeps a
+transposition table and an evaluation cache shared by all difficulties,
+each up to 2^18 entries (about 0.3 GB per worker of 4 threads once full). The
+default of one worker per core counts the host's cores, not a container
+limit, so set WEB_CONCURRENCY explicitly in containers.
+"""
+
+import multiprocessing
+import os
+
+bind = '0.0.0.0:8000'
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# import app (and run its warm-up) once in the master, then fork: the AIs'
+# lookup tables are shared copy-on-write instead of rebuilt per worker
+preload_app = True
+
+# expert searches on a busy board can take a few seconds
+timeout = 60
@@ -1,4 +1,4 @@
-"""
+r"""
 Working Gomoku AI - exact architecture match for gomoku_rl models.
 
 Models from: https://github.com/hesic73/gomoku_rl
@@ -14,11 +14,33 @@ Citation:
 }
 """
 
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+try:
+    import onnxruntime as ort
+except ImportError:  # optional, only needed for GomokuAI(backend="onnx")
+    ort = None
+
+
+# checkpoint key prefix -> model key prefix, first match wins; see GomokuAI._remap_state_dict
+CHECKPOINT_PREFIXES = (
+    ('module.0.module.', ''),                       # encoder
+    ('module.1.module.cnn', 'policy_cnn'),          # policy head
+    ('module.1.module.bn', 'policy_bn'),
+    ('module.1.module.linear', 'policy_linear'),
+    ('module.1.module.', 'module.1.module.'),       # other head keys, kept (reported as unexpected)
+)
 
 
 class ResidualBlock(nn.Module):
@@ -58,7 +80,7 @@ class GomokuPolicyNetwork(nn.Module):
         self.policy_bn = nn.BatchNorm2d(2)
         self.policy_linear = nn.Linear(2 * board_size * board_size, board_size * board_size)
 
-    def forward(self, x, action_mask=None):
+    def forward(self, x: torch.Tensor, action_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
         """
         Args:
             x: (batch, 3, 15, 15)
@@ -74,7 +96,7 @@ class GomokuPolicyNetwork(nn.Module):
 
         # Policy head
         policy = F.relu(self.policy_bn(self.policy_cnn(out)))
-        policy = policy.view(policy.size(0), -1)  # Flatten
+        policy = policy.flatten(1)  # Flatten (copies out of channels_last)
         logits = self.policy_linear(policy)
 
         if action_mask is not None:
@@ -83,13 +105,215 @@ class GomokuPolicyNetwork(nn.Module):
         return logits
 
 
+class QuantizedPolicyNetwork(nn.Module):
+    """int8 logits graph from quantize_static, with the action mask applied in float"""
+    def __init__(self, logits: nn.Module):
+        super().__init__()
+        self.logits = logits
+
+    def forward(self, x: torch.Tensor, action_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        logits = self.logits(x)
+
+        if action_mask is not None:
+            logits = logits.masked_fill(~action_mask, float('-inf'))
+
+        return logits
+
+
+class OnnxPolicyNetwork:
+    """
+    Exported policy network run by ONNX Runtime on CPU, called like the
+    torch model: (batch, 3, N, N) float32 tensor and optional mask in,
+    logits tensor out.
+    """
+    def __init__(self, path: str, threads: int = 0):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads  # 0 lets ORT pick
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, x: torch.Tensor, action_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        # ORT reads plain NCHW memory, so undo channels_last before handing it over
+        (logits,) = self.session.run(None, {'x': x.contiguous().numpy()})
+        logits = torch.from_numpy(logits)
+
+        if action_mask is not None:
+            logits = logits.masked_fill(~action_mask, float('-inf'))
+
+        return logits
+
+
+def export_onnx(model: GomokuPolicyNetwork, path: str) -> None:
+    """
+    Export the float model's logits (no mask) to ONNX with a dynamic batch axis.
+    Written to a temporary file and renamed over path, so a concurrent or
+    interrupted export never leaves a partial file behind.
+    """
+    dummy = torch.zeros(1, 3, model.board_size, model.board_size)
+    fd, tmp_path = tempfile.mkstemp(suffix='.onnx', dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        torch.onnx.export(
+            model,
+            (dummy,),
+            tmp_path,
+            input_names=['x'],
+            output_names=['logits'],
+            dynamic_axes={'x': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=17,
+            dynamo=False
+        )
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def fold_batchnorm(model: GomokuPolicyNetwork) -> GomokuPolicyNetwork:
+    """
+    Fold every eval-mode BatchNorm into the conv before it and replace the
+    BatchNorm with Identity. Same outputs, one fewer pass over each activation.
+    """
+    pairs = [(model, 'cnn', 'bn'), (model, 'policy_cnn', 'policy_bn')]
+    for block in model.layers:
+        pairs += [(block, 'cnn_0', 'bn_0'), (block, 'cnn_1', 'bn_1')]
+
+    for module, conv_name, bn_name in pairs:
+        fused = fuse_conv_bn_eval(getattr(module, conv_name), getattr(module, bn_name))
+        setattr(module, conv_name, fused)
+        setattr(module, bn_name, nn.Identity())
+
+    return model
+
+
+def calibration_inputs(board_size: int, count: int = 512, seed: int = 0) -> torch.Tensor:
+    """
+    Synthetic (count, 3, N, N) channels_last inputs for quantize_static:
+    random positions from empty to about half full, either side to move.
+    """
+    rng = np.random.default_rng(seed)
+    density = rng.random((count, 1, 1)) * 0.5
+    boards = rng.integers(1, 3, (count, board_size, board_size)) * (rng.random((count, board_size, board_size)) < density)
+    players = rng.integers(1, 3, (count, 1, 1))
+
+    planes = np.stack([boards == players, boards == 3 - players, boards == 0], axis=1).astype(np.float32)
+    return torch.from_numpy(planes).contiguous(memory_format=torch.channels_last)
+
+
+def quantize_static(model: GomokuPolicyNetwork, calibration: torch.Tensor) -> nn.Module:
+    """
+    Post-training static int8 quantization (FX graph mode) of a folded model.
+
+    Convs and the Linear run as int8 kernels with activation scales observed
+    on the calibration inputs; only the action mask is applied in float.
+    """
+    # tracing through Sequential calls forward(x) with no mask, so the graph is just the logits
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    observed = prepare_fx(nn.Sequential(model), qconfig_mapping, example_inputs=(calibration[:1],))
+
+    with torch.inference_mode():
+        for batch in calibration.split(64):
+            observed(batch)
+
+    return QuantizedPolicyNetwork(convert_fx(observed)).eval()
+
+
+def prepare_for_inference(model: nn.Module, device: str) -> nn.Module:
+    """
+    Convert a loaded network into its serving form.
+
+    - BatchNorm folded into the convs
+    - channels_last layout for the conv tower (what cuDNN/oneDNN prefer)
+    - CUDA: fp16 weights so the convs can run on Tensor Cores
+    - CPU: int8 static quantization of the whole network (falls back to
+      dynamic quantization of the policy Linear layer if that fails)
+
+    Inputs must then be built with input_dtype(device) and channels_last.
+    """
+    model = fold_batchnorm(model.eval()).to(device)
+    model = model.to(memory_format=torch.channels_last)
+
+    if str(device).startswith('cuda'):
+        model = model.half()
+    else:
+        try:
+            model = quantize_static(model, calibration_inputs(model.board_size))
+        except Exception as e:
+            print(f"⚠️  Static quantization failed, using dynamic: {e}")
+            model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    return model
+
+
+def compile_for_inference(model: nn.Module, device: str) -> nn.Module:
+    """
+    Remove per-op Python dispatch from the forward pass.
+
+    CUDA uses torch.compile (reduce-overhead captures CUDA graphs); CPU uses
+    a frozen TorchScript module, which also constant-folds the eval-mode
+    BatchNorms. Falls back to the eager model if compilation isn't supported.
+    """
+    try:
+        if str(device).startswith('cuda'):
+            return torch.compile(model, mode='reduce-overhead', dynamic=False)
+        return torch.jit.freeze(torch.jit.script(model))
+    except Exception as e:
+        print(f"⚠️  Model compilation failed, using eager mode: {e}")
+        return model
+
+
+def symmetry_permutations(board_size: int) -> np.ndarray:
+    """
+    Flat-index permutations for the 8 board symmetries (4 rotations x mirror).
+
+    Row k satisfies transform_k(board).flatten() == board.flatten()[perms[k]].
+    """
+    cells = np.arange(board_size * board_size).reshape(board_size, board_size)
+    perms = []
+    for grid in (cells, np.fliplr(cells)):
+        for turns in range(4):
+            perms.append(np.rot90(grid, turns).flatten())
+    return np.stack(perms)
+
+
+def input_dtype(device: str) -> torch.dtype:
+    """Input dtype expected by a model from prepare_for_inference"""
+    return torch.float16 if str(device).startswith('cuda') else torch.float32
+
+
 class GomokuAI:
     """Gomoku AI using pretrained models"""
 
-    def __init__(self, model_path: str, board_size: int = 15, device: str = "cpu"):
+    def __init__(
+        self,
+        model_path: str,
+        board_size: int = 15,
+        device: str = "cpu",
+        cache_size: int = 65536,
+        backend: str = "torch"
+    ):
+        """
+        backend "torch" serves the prepared (quantized or fp16) and compiled
+        torch model; "onnx" exports the float model next to the checkpoint
+        once and serves it with ONNX Runtime on CPU (needs onnx + onnxruntime).
+        """
+        if backend == "onnx":
+            if ort is None:
+                raise ImportError("backend='onnx' needs the onnxruntime package")
+            device = "cpu"
+
         self.board_size = board_size
         self.device = device
 
+        # Per-thread input buffers, reused across moves (see _input_buffer)
+        self._buffers = threading.local()
+
+        # LRU of moves keyed on the canonical (symmetry-reduced) board, see get_move
+        self.cache_size = cache_size
+        self._move_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._symmetries = symmetry_permutations(board_size)
+
         # Load checkpoint
         checkpoint = torch.load(model_path, map_location=device)
 
@@ -112,10 +336,32 @@ class GomokuAI:
         if unexpected:
             print(f"⚠️  Unexpected keys: {len(unexpected)}")
 
-        self.model.to(device)
-        self.model.eval()
+        if backend == "onnx":
+            # re-export only when the checkpoint is newer than the .onnx file
+            onnx_path = os.path.splitext(model_path)[0] + '.onnx'
+            if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(model_path):
+                export_onnx(fold_batchnorm(self.model.eval()), onnx_path)
+            self.model = OnnxPolicyNetwork(onnx_path)
+        else:
+            self.model = prepare_for_inference(self.model, device)
+            self.model = compile_for_inference(self.model, device)
+        self.input_dtype = input_dtype(device)
+        self._warm_up()
         print(f"✅ Model loaded successfully")
 
+    def _warm_up(self):
+        """
+        Run a few forward passes on an empty board so compilation, freezing
+        and CUDA graph capture (which records on a later call) happen at
+        load time instead of on the first real request.
+        """
+        empty = np.zeros((self.board_size, self.board_size), dtype=np.int8)
+        board_tensor = self.board_to_tensor(empty, 1)
+
+        with torch.inference_mode():
+            for _ in range(3):
+                self.model(board_tensor)
+
     def _remap_state_dict(self, ckpt_state):
         """
         Remap checkpoint keys to model keys.
@@ -129,17 +375,10 @@ class GomokuAI:
         new_state = {}
 
         for ckpt_key, value in ckpt_state.items():
-            # Remove "module.0.module." prefix for encoder
-            if ckpt_key.startswith('module.0.module.'):
-                model_key = ckpt_key.replace('module.0.module.', '')
-                new_state[model_key] = value
-
-            # Remove "module.1.module." prefix for policy head
-            elif ckpt_key.startswith('module.1.module.'):
-                model_key = ckpt_key.replace('module.1.module.cnn', 'policy_cnn')
-                model_key = model_key.replace('module.1.module.bn', 'policy_bn')
-                model_key = model_key.replace('module.1.module.linear', 'policy_linear')
-                new_state[model_key] = value
+            for prefix, replacement in CHECKPOINT_PREFIXES:
+                if ckpt_key.startswith(prefix):
+                    new_state[replacement + ckpt_key[len(prefix):]] = value
+                    break
 
         return new_state
 
@@ -154,45 +393,150 @@ class GomokuAI:
         Returns:
             (1, 3, 15, 15) with channels [current, opponent, empty]
         """
-        board_np = np.array(board, dtype=np.float32)
+        return self._board_and_mask(board, current_player)[0]
+
+    def _board_and_mask(self, board: List[List[int]], current_player: int) -> Tuple[torch.Tensor, np.ndarray]:
+        """
+        board_to_tensor plus the (1, N*N) boolean legal-move mask, which is
+        the empty channel, so the board is only scanned for empties once.
+        """
+        board_np = np.asarray(board, dtype=np.int8)
+        tensor, planes = self._input_buffer()
 
-        current_stones = (board_np == current_player).astype(np.float32)
+        # Write the comparisons straight into the buffer (bool -> 0.0/1.0)
         opponent = 3 - current_player
-        opponent_stones = (board_np == opponent).astype(np.float32)
-        empty = (board_np == 0).astype(np.float32)
+        np.equal(board_np, current_player, out=planes[0, 0], casting='unsafe')
+        np.equal(board_np, opponent, out=planes[0, 1], casting='unsafe')
+        empty = board_np == 0
+        planes[0, 2] = empty
+
+        board_tensor = tensor.to(
+            self.device,
+            dtype=self.input_dtype,
+            non_blocking=True,
+            memory_format=torch.channels_last
+        )
+        return board_tensor, empty.reshape(1, -1)
+
+    def _input_buffer(self) -> Tuple[torch.Tensor, np.ndarray]:
+        """
+        Get this thread's (1, 3, N, N) float32 input tensor and a numpy view of it.
 
-        tensor = np.stack([current_stones, opponent_stones, empty], axis=0)
-        return torch.from_numpy(tensor).unsqueeze(0).to(self.device)
+        The buffer is overwritten by the next board_to_tensor call on the same
+        thread. On CUDA it lives in pinned memory so the host-to-device copy
+        can run asynchronously.
+        """
+        buffer = getattr(self._buffers, 'input', None)
+        if buffer is None:
+            size = self.board_size
+            tensor = torch.empty(
+                (1, 3, size, size),
+                dtype=torch.float32,
+                pin_memory=str(self.device).startswith('cuda')
+            )
+            buffer = (tensor, tensor.numpy())
+            self._buffers.input = buffer
+        return buffer
 
     def get_action_mask(self, board: List[List[int]]) -> torch.Tensor:
         """Create boolean mask of valid moves"""
-        board_np = np.array(board)
+        board_np = np.asarray(board)
         mask = (board_np == 0).flatten()
         return torch.from_numpy(mask).unsqueeze(0).to(self.device)
 
+    def _best_actions(self, logits: torch.Tensor, legal: np.ndarray) -> np.ndarray:
+        """
+        Index of the highest legal logit in each row.
+
+        The model runs unmasked; masking and argmax happen on the numpy copy
+        of the logits, which skips the masked_fill and argmax kernels and
+        the tensor-to-scalar round trip.
+        """
+        scores = logits.float().cpu().numpy()
+        scores[~legal] = -np.inf
+        return scores.argmax(axis=1)
+
     def get_move(self, board: List[List[int]], current_player: int) -> Tuple[int, int]:
         """
         Get AI's move.
 
         Args:
-            board: 15x15 board (0=empty, 1=black, 2=white)
+            board: 15x15 board (0=empty, 1=black, 2=white), list or ndarray
             current_player: 1 or 2
 
         Returns:
             (row, col)
-        """
-        board_tensor = self.board_to_tensor(board, current_player)
-        action_mask = self.get_action_mask(board)
-
-        with torch.no_grad():
-            logits = self.model(board_tensor, action_mask)
-            action = torch.argmax(logits, dim=1).item()
 
+        Boards are reduced to a canonical form under the 8 rotations and
+        reflections first, so the network runs on (and the cache stores)
+        one representative per symmetry class.
+        """
+        flat = np.asarray(board, dtype=np.int8).reshape(-1)
+
+        # all 8 transformed boards in one gather; the smallest bytes is canonical
+        variants = flat[self._symmetries]
+        keys = [variant.tobytes() for variant in variants]
+        k = min(range(len(keys)), key=keys.__getitem__)
+        cache_key = (keys[k], current_player)
+
+        with self._cache_lock:
+            action = self._move_cache.get(cache_key)
+            if action is not None:
+                self._move_cache.move_to_end(cache_key)
+
+        if action is None:
+            canonical = variants[k].reshape(self.board_size, self.board_size)
+            board_tensor, legal = self._board_and_mask(canonical, current_player)
+
+            with torch.inference_mode():
+                logits = self.model(board_tensor)
+            action = int(self._best_actions(logits, legal)[0])
+
+            with self._cache_lock:
+                self._move_cache[cache_key] = action
+                if len(self._move_cache) > self.cache_size:
+                    self._move_cache.popitem(last=False)
+
+        # action indexes the canonical board; map it back to this board's cell
+        action = int(self._symmetries[k][action])
         row = action // self.board_size
         col = action % self.board_size
 
         return (row, col)
 
+    def get_moves(self, boards: List[List[List[int]]], current_players: List[int]) -> List[Tuple[int, int]]:
+        """
+        Batched get_move: picks a move for every board in one forward pass.
+
+        Args:
+            boards: B boards, each 15x15 (0=empty, 1=black, 2=white)
+            current_players: player to move (1 or 2) for each board
+
+        Returns:
+            [(row, col), ...] in the same order as boards
+        """
+        boards_np = np.asarray(boards, dtype=np.int8)
+        players = np.asarray(current_players, dtype=np.int8).reshape(-1, 1, 1)
+
+        planes = np.empty((len(boards_np), 3, self.board_size, self.board_size), dtype=np.float32)
+        np.equal(boards_np, players, out=planes[:, 0], casting='unsafe')
+        np.equal(boards_np, 3 - players, out=planes[:, 1], casting='unsafe')
+        empty = boards_np == 0
+        planes[:, 2] = empty
+
+        board_tensor = torch.from_numpy(planes).to(
+            self.device,
+            dtype=self.input_dtype,
+            memory_format=torch.channels_last
+        )
+        legal = empty.reshape(len(boards_np), -1)
+
+        with torch.inference_mode():
+            logits = self.model(board_tensor)
+        actions = self._best_actions(logits, legal).tolist()
+
+        return [divmod(action, self.board_size) for action in actions]
+
 
 if __name__ == "__main__":
     print("=== Testing PPO Model ===\n")
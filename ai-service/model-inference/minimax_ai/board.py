@@ -0,0 +1,314 @@
+"""
+Bitboard game state for the minimax AI.
+
+Each player's stones are packed into a Python int with one bit per cell.
+Rows are laid out with a stride of board_size + 1, so the spare bit at the
+end of every row is always empty and a shifted run can never wrap onto the
+next row.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def has_five(bits: int, shifts: Tuple[int, ...]) -> bool:
+    """True if the stones in bits contain 5 in a row along any of the 4 direction shifts"""
+    h, v, d, a = shifts
+
+    # bit i of x & (x >> 2s) & (bits >> 4s) is set only if cells i, i+s, ..., i+4s
+    # are all set; unrolled because this runs at every search node
+    x = bits & (bits >> h)
+    if x & (x >> 2 * h) & (bits >> 4 * h):
+        return True
+    x = bits & (bits >> v)
+    if x & (x >> 2 * v) & (bits >> 4 * v):
+        return True
+    x = bits & (bits >> d)
+    if x & (x >> 2 * d) & (bits >> 4 * d):
+        return True
+    x = bits & (bits >> a)
+    return bool(x & (x >> 2 * a) & (bits >> 4 * a))
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Random 64-bit key per (player, bit index), fixed for a given board size"""
+    bit_count = board_size * (board_size + 1)
+
+    # one vectorized draw; tolist() gives Python ints, which XOR faster than numpy scalars
+    keys = np.random.default_rng(board_size).integers(0, 1 << 64, size=(2, bit_count), dtype=np.uint64)
+    return ((),) + tuple(tuple(row) for row in keys.tolist())
+
+
+@lru_cache(maxsize=None)
+def cell_tables(board_size: int) -> Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...]]:
+    """
+    Center-first ordering of the bit indices, fixed for a given board size.
+
+    Returns (center_rank, ranked_positions): center_rank[bit] is the bit's
+    position when sorted by Manhattan distance to the center (ties by bit
+    index), and ranked_positions[rank] is the (row, col) at that rank.
+    """
+    stride = board_size + 1
+    center = board_size // 2
+    positions = [divmod(i, stride) for i in range(board_size * stride)]
+    order = sorted(range(len(positions)), key=lambda i: abs(positions[i][0] - center) + abs(positions[i][1] - center))
+
+    center_rank = [0] * len(order)
+    for rank, i in enumerate(order):
+        center_rank[i] = rank
+    return tuple(center_rank), tuple(positions[i] for i in order)
+
+
+@lru_cache(maxsize=None)
+def symmetry_maps(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Bit index permutations for the 8 board symmetries (4 rotations x mirror).
+
+    maps[k][i] is where bit i lands under symmetry k; maps[0] is the identity.
+    """
+    stride = board_size + 1
+    last = board_size - 1
+    maps = []
+    for mirror in (False, True):
+        for turns in range(4):
+            mapping = list(range(board_size * stride))
+            for row in range(board_size):
+                for col in range(board_size):
+                    r, c = row, last - col if mirror else col
+                    for _ in range(turns):
+                        r, c = last - c, r
+                    mapping[row * stride + col] = r * stride + c
+            maps.append(tuple(mapping))
+    return tuple(maps)
+
+
+@lru_cache(maxsize=None)
+def inverse_symmetry_maps(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """inverse[k][j] is the bit that symmetry_maps(board_size)[k] moves to bit j"""
+    inverses = []
+    for mapping in symmetry_maps(board_size):
+        inverse = [0] * len(mapping)
+        for i, j in enumerate(mapping):
+            inverse[j] = i
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+
+@lru_cache(maxsize=None)
+def neighborhood_masks(board_size: int, radius: int) -> Tuple[int, ...]:
+    """Per bit index, the bitboard of on-board cells within radius of it (a (2r+1)x(2r+1) square)"""
+    stride = board_size + 1
+    masks = [0] * (board_size * stride)
+    for row in range(board_size):
+        for col in range(board_size):
+            mask = 0
+            for r in range(max(0, row - radius), min(board_size, row + radius + 1)):
+                for c in range(max(0, col - radius), min(board_size, col + radius + 1)):
+                    mask |= 1 << (r * stride + c)
+            masks[row * stride + col] = mask
+    return tuple(masks)
+
+
+@lru_cache(maxsize=None)
+def valid_mask(board_size: int) -> int:
+    """Bitboard of every on-board cell, i.e. all bits except the spare column"""
+    stride = board_size + 1
+    row_bits = (1 << board_size) - 1
+    return sum(row_bits << (row * stride) for row in range(board_size))
+
+
+class Board:
+    """Gomoku position backed by one bitboard per player"""
+
+    def __init__(
+        self,
+        board_state: Optional[Union[np.ndarray, List[List[int]]]] = None,
+        board_size: int = 15
+    ):
+        self.board_size = board_size
+        self.stride = board_size + 1
+
+        # bit offset of the next cell for horizontal, vertical, diagonal, anti-diagonal
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+
+        self.valid = valid_mask(board_size)
+        self.bits = [0, 0, 0]  # indexed by player number, slot 0 unused
+
+        # Zobrist hash of the position, updated incrementally by make/undo
+        self.zobrist = zobrist_keys(board_size)
+        self.hash = 0
+        self.move_count = 0
+
+        # cells within 2 of any stone, and within 1 of each player's stones, kept
+        # up to date by make_move; undo_move restores them from the _undo stack
+        self.near_masks = neighborhood_masks(board_size, 2)
+        self.adjacent_masks = neighborhood_masks(board_size, 1)
+        self.near = 0
+        self.adjacent = [0, 0, 0]
+        self._undo = []
+
+        if board_state is not None:
+            self.load(board_state)
+        else:
+            # player per cell, flat and in bit index order (spare column included)
+            self.cells = [0] * (board_size * self.stride)
+
+    def load(self, board_state: Union[np.ndarray, List[List[int]]]) -> None:
+        """Replace this position with board_state, reusing the Board object"""
+        cells = np.asarray(board_state, dtype=np.int8)
+        size = self.board_size
+        self.hash = 0
+
+        # pad each row with the spare column so the flat bit order matches the bitboard layout
+        padded = np.zeros((size, self.stride), dtype=np.int8)
+        padded[:, :size] = cells
+        self.cells = padded.ravel().tolist()
+
+        stones = np.zeros((size, self.stride), dtype=np.bool_)
+        for player in (1, 2):
+            np.equal(padded, player, out=stones)
+            packed = np.packbits(stones, bitorder='little')
+            self.bits[player] = int.from_bytes(packed.tobytes(), 'little')
+
+            keys = self.zobrist[player]
+            bits = self.bits[player]
+            while bits:
+                low = bits & -bits
+                self.hash ^= keys[low.bit_length() - 1]
+                bits ^= low
+
+        self.move_count = self.occupied().bit_count()
+
+        self.near = self.dilate(self.occupied(), 2)
+        self.adjacent = [0, self.dilate(self.bits[1]), self.dilate(self.bits[2])]
+        self._undo = []
+
+    def make_move(self, row: int, col: int, player: int) -> None:
+        """Place a stone for player at (row, col)"""
+        index = row * self.stride + col
+        self.cells[index] = player
+        self.bits[player] |= 1 << index
+        self.hash ^= self.zobrist[player][index]
+        self.move_count += 1
+
+        self._undo.append((self.near, self.adjacent[player]))
+        self.near |= self.near_masks[index]
+        self.adjacent[player] |= self.adjacent_masks[index]
+
+    def undo_move(self, row: int, col: int) -> None:
+        """Remove the stone at (row, col), which must be the last move made"""
+        index = row * self.stride + col
+        player = self.cells[index]
+        self.cells[index] = 0
+        self.bits[player] &= ~(1 << index)
+        self.hash ^= self.zobrist[player][index]
+        self.move_count -= 1
+
+        self.near, self.adjacent[player] = self._undo.pop()
+
+    def to_array(self) -> np.ndarray:
+        """The position as a (board_size, board_size) int8 array, as accepted by load()"""
+        size = self.board_size
+        return np.array(self.cells, dtype=np.int8).reshape(size, self.stride)[:, :size]
+
+    def canonical_hash(self) -> int:
+        """
+        Smallest Zobrist hash over the 8 rotations and reflections of this
+        position, equal for all symmetric variants. Costs 8 passes over the
+        stones, so it is meant for positions with few of them.
+        """
+        return self.canonical_key()[0]
+
+    def canonical_key(self) -> Tuple[int, int]:
+        """
+        canonical_hash, and the index into symmetry_maps of a symmetry that
+        takes this position to the variant with that hash.
+        """
+        stones = []
+        for player in (1, 2):
+            bits = self.bits[player]
+            while bits:
+                low = bits & -bits
+                stones.append((self.zobrist[player], low.bit_length() - 1))
+                bits ^= low
+
+        best = self.hash
+        best_symmetry = 0
+        for symmetry, mapping in enumerate(symmetry_maps(self.board_size)[1:], 1):
+            value = 0
+            for keys, index in stones:
+                value ^= keys[mapping[index]]
+            if value < best:
+                best = value
+                best_symmetry = symmetry
+        return best, best_symmetry
+
+    def symmetries(self) -> List[Tuple[int, ...]]:
+        """
+        The bit index maps from symmetry_maps (identity excluded) that leave
+        this position unchanged. Costs up to 7 passes over the stones.
+        """
+        stones = []
+        occupied = self.occupied()
+        while occupied:
+            low = occupied & -occupied
+            stones.append(low.bit_length() - 1)
+            occupied ^= low
+
+        cells = self.cells
+        return [
+            mapping for mapping in symmetry_maps(self.board_size)[1:]
+            if all(cells[mapping[index]] == cells[index] for index in stones)
+        ]
+
+    def check_win(self, player: int) -> bool:
+        """True if player has 5 in a row anywhere on the board"""
+        return has_five(self.bits[player], self.shifts)
+
+    def winning_cells(self, player: int) -> int:
+        """Bitboard of the empty cells where player would complete five in a row"""
+        bits = self.bits[player]
+        cells = 0
+
+        # a cell completes five along s if the runs of player's stones ending right
+        # before it and starting right after it add up to 4 or more; runs never
+        # continue across the spare column, which is always empty
+        for s in self.shifts:
+            before_1 = bits << s
+            before_2 = before_1 & (bits << (2 * s))
+            before_3 = before_2 & (bits << (3 * s))
+            after_1 = bits >> s
+            after_2 = after_1 & (bits >> (2 * s))
+            after_3 = after_2 & (bits >> (3 * s))
+            cells |= (
+                (before_3 & (bits << (4 * s))) | (after_3 & (bits >> (4 * s)))
+                | (before_3 & after_1) | (before_2 & after_2) | (before_1 & after_3)
+            )
+        return cells & self.valid & ~self.occupied()
+
+    def occupied(self) -> int:
+        """Bitboard of all stones"""
+        return self.bits[1] | self.bits[2]
+
+    def dilate(self, bits: int, radius: int = 1) -> int:
+        """Grow bits by radius cells in every direction (a (2r+1)x(2r+1) square)"""
+        valid = self.valid
+        stride = self.stride
+
+        # one-cell steps so a stone on the edge only spills into the spare
+        # column or off the board, both of which the valid mask drops
+        for _ in range(radius):
+            bits |= ((bits << 1) | (bits >> 1)) & valid
+        for _ in range(radius):
+            bits |= ((bits << stride) | (bits >> stride)) & valid
+        return bits
+
+    def winner(self) -> Optional[int]:
+        """Returns the player with 5 in a row, or None"""
+        for player in (1, 2):
+            if self.check_win(player):
+                return player
+        return None
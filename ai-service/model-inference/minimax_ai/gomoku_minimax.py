@@ -1,5 +1,85 @@
-from typing import List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Union
+import multiprocessing
 import random
+import threading
+import time
+
+import numpy as np
+
+try:
+    from minimax_ai.board import Board, cell_tables, inverse_symmetry_maps, symmetry_maps
+except ModuleNotFoundError:  # run as a script: python minimax_ai/gomoku_minimax.py
+    from board import Board, cell_tables, inverse_symmetry_maps, symmetry_maps
+
+# transposition table entry flags: the stored value is exact, a lower bound or an upper bound
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# alpha-beta window bound, an int above any score (wins are FIVE plus 100 per remaining ply)
+# so scores and bounds stay plain ints
+INF = 10 ** 9
+
+# XORed into the transposition key when player 2 is to move
+PLAYER_TWO_TO_MOVE = random.Random(0).getrandbits(64)
+
+# static evaluations per board size, shared by every AI on the same thread, see _reset_search_tables
+_eval_caches = threading.local()
+
+# transposition tables per board size, shared the same way so one tt_size bounds them
+_transposition_tables = threading.local()
+
+# per-process AIs for _search_root_move, so worker TTs and caches persist between tasks
+_worker_ais = {}
+
+# (search id, alpha) shared by the pool's workers, see _init_worker
+_shared_bound = None
+
+
+def _init_worker(search_id: multiprocessing.Value, alpha: multiprocessing.Value) -> None:
+    """Pool initializer: keep the shared root bound of the parent's pool"""
+    global _shared_bound
+    _shared_bound = (search_id, alpha)
+
+
+def _search_root_move(
+    difficulty: str,
+    board_size: int,
+    cells: np.ndarray,
+    move: Tuple[int, int],
+    depth: int,
+    ai_player: int,
+    alpha: int,
+    search_id: int
+) -> Tuple[int, bool]:
+    """
+    Process pool task: score one root move of GomokuMinimaxAI._search_root_parallel.
+
+    Starts from the best root score any sibling has published for this
+    search and publishes its own if it beats it. Returns (score, exact);
+    a score that isn't exact is only an upper bound below the alpha used.
+    """
+    ai = _worker_ais.get(difficulty)
+    if ai is None:
+        ai = _worker_ais[difficulty] = GomokuMinimaxAI(difficulty, board_size)
+
+    board = ai._board(cells)
+    ai._reset_search_tables(board)
+
+    shared_id, shared_alpha = _shared_bound
+    with shared_id.get_lock():
+        if shared_id.value == search_id:
+            alpha = max(alpha, shared_alpha.value)
+
+    row, col = move
+    board.make_move(row, col, ai_player)
+    # window lowered by one so a move tying alpha still gets an exact score
+    score = -ai._negamax(board, depth - 1, -INF, 1 - alpha, 3 - ai_player)
+
+    if score > alpha:
+        with shared_id.get_lock():
+            if shared_id.value == search_id and score > shared_alpha.value:
+                shared_alpha.value = score
+    return score, score >= alpha
 
 
 class GomokuMinimaxAI:
@@ -7,13 +87,20 @@ class GomokuMinimaxAI:
     AI for 15x15 Gomoku with alpha-beta pruning.
 
     Difficulty levels:
-    - Easy: depth 1, simple evaluation
-    - Medium: depth 2, full evaluation
-    - Hard: depth 3, full evaluation
-    - Expert: depth 4, full evaluation
+    - Easy: depth 1, simple evaluation, top 5 root moves
+    - Medium: depth 2, full evaluation, top 10 root moves
+    - Hard: depth 3, full evaluation, top 15 root moves
+    - Expert: depth 4, full evaluation, top 20 root moves
     """
 
-    def __init__(self, difficulty: str = "medium", board_size: int = 15):
+    def __init__(
+        self,
+        difficulty: str = "medium",
+        board_size: int = 15,
+        time_limit: Optional[float] = None,
+        workers: int = 0,
+        seed: Optional[int] = None
+    ):
         self.board_size = board_size
         self.difficulty = difficulty.lower()
 
@@ -26,6 +113,28 @@ class GomokuMinimaxAI:
         }
         self.max_depth = self.depth_map.get(self.difficulty, 2)
 
+        # moves kept after static move scoring at the root, narrower for the
+        # shallower difficulties, and at interior nodes
+        self.root_beam_map = {
+            "easy": 5,
+            "medium": 10,
+            "hard": 15,
+            "expert": 20
+        }
+        self.root_beam = self.root_beam_map.get(self.difficulty, 10)
+        self.beam = 12
+
+        # optional wall-clock budget in seconds, checked between deepening iterations
+        self.time_limit = time_limit
+
+        # processes for root-parallel search at depth >= 3; 0 or 1 searches serially
+        self.workers = workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        # picks among equally scored root moves so games don't repeat; seed for reproducible play
+        self._rng = random.Random(seed)
+
         # need patter scores for evaluation
         self.FIVE = 100000      # Win
         self.OPEN_FOUR = 10000  # Guaranteed win next turn
@@ -35,7 +144,58 @@ class GomokuMinimaxAI:
         self.OPEN_TWO = 50      # Potential
         self.TWO = 10           # Weak potential
 
-    def get_move(self, board: List[List[int]], current_player: int) -> Tuple[int, int]:
+        # (open, blocked) score by run length
+        self.run_scores = {
+            2: (self.OPEN_TWO, self.TWO),
+            3: (self.OPEN_THREE, self.THREE),
+            4: (self.OPEN_FOUR, self.FOUR)
+        }
+
+        # every stone of a run scores it, so a run adds length * its score:
+        # (open, blocked) weights for lengths 2, 3, 4, flattened for _pattern_score
+        self.run_weights = tuple(
+            length * score for length in (2, 3, 4) for score in self.run_scores[length]
+        )
+
+        # lookup tables indexed by bitboard bit, shared by every instance
+        self.center_rank, self.ranked_positions = cell_tables(board_size)
+        # the same as arrays for _get_candidate_moves; ranked_positions is repeated
+        # so ranks offset by one table length (the second group) map to it too
+        self.rank_array = np.array(self.center_rank, dtype=np.int32)
+        self.ranked_twice = self.ranked_positions * 2
+
+        # one reusable Board and search tables per request thread, see _board()
+        self._local = threading.local()
+        self.tt_size = 1 << 18
+        # XORed into this AI's TT keys, indexed by the player to move: AIs share a
+        # thread's table but search to different depths and beams, so each keeps
+        # to its own entries
+        salt = random.getrandbits(64)
+        self.tt_keys = (0, salt, salt ^ PLAYER_TWO_TO_MOVE)
+        # below this many stones, key the TT on the symmetry-canonical hash
+        self.symmetry_moves = 10
+        self.eval_cache_size = 1 << 18
+        # forced blocks followed past the search horizon, see _quiesce
+        self.quiescence_depth = 4
+        # depth reduction of the null-move search, see _search_moves
+        self.null_reduction = 2
+
+    def get_move(self, board_state: Union[np.ndarray, List[List[int]]], current_player: int) -> Tuple[int, int]:
+        board = self._board(board_state)
+
+        # a finished game has no move to make; the bitboard five check covers the whole board
+        winner = board.winner()
+        if winner is not None:
+            raise ValueError(f'Game is already over: player {winner} has five in a row')
+        if board.move_count == self.board_size * self.board_size:
+            raise ValueError('Board is full')
+
+        # opening move: nothing to search, take the center
+        center = self.board_size // 2
+        if not board.move_count:
+            return (center, center)
+
+        self._reset_search_tables(board)
 
         winning_move = self._find_winning_move(board, current_player)
         if winning_move:
@@ -46,227 +206,533 @@ class GomokuMinimaxAI:
         if blocking_move:
             return blocking_move
 
-        best_score = float('-inf')
+        candidates = self._get_candidate_moves(board, current_player)
+
+        if not candidates:
+            return (center, center)
+
+        candidates = self._beam(board, current_player, candidates, self.root_beam)
+
+        # in a symmetric opening, moves that map onto each other score the same:
+        # keep the lowest bit index of each class (after the beam, so the cut
+        # still sees the duplicates and keeps the same set of distinct moves)
+        stride = board.stride
+        symmetries = board.symmetries() if board.move_count < self.symmetry_moves else []
+        if symmetries:
+            candidates = [
+                (row, col) for row, col in candidates
+                if all(mapping[row * stride + col] >= row * stride + col for mapping in symmetries)
+            ]
+
+        # iterative deepening: each iteration searches the previous best move first,
+        # and the transposition table carries move ordering into the deeper search
+        started = time.monotonic()
         best_move = None
-        alpha = float('-inf')
-        beta = float('inf')
+        for depth in range(1, self.max_depth + 1):
+            if best_move is not None:
+                candidates.remove(best_move)
+                candidates.insert(0, best_move)
 
-        candidates = self._get_candidate_moves(board)
+            best_move = self._search_root(board, candidates, depth, current_player, opponent)
 
-        if not candidates:
-            return (7, 7)
+            if self.time_limit is not None and time.monotonic() - started >= self.time_limit:
+                break
+
+        best_move = best_move if best_move else candidates[0]
+
+        # the kept move stands for its whole class: play it through a random symmetry
+        # of the position (or the identity), so replies aren't all in one corner
+        if symmetries:
+            index = best_move[0] * stride + best_move[1]
+            images = [index] + [mapping[index] for mapping in symmetries]
+            best_move = divmod(self._rng.choice(images), stride)
+        return best_move
+
+    def _search_root(
+        self,
+        board: Board,
+        candidates: List[Tuple[int, int]],
+        depth: int,
+        ai_player: int,
+        opponent: int
+    ) -> Optional[Tuple[int, int]]:
+        """Best root move for a full-width search to depth, ties picked at random"""
+        if self.workers > 1 and depth >= 3 and len(candidates) > 1:
+            return self._search_root_parallel(board, candidates, depth, ai_player, opponent)
+
+        best_score = -INF
+        best_moves = []
+        alpha = -INF
+        beta = INF
+
+        # depth 1 (all of easy's search) has only leaves: get_move already ruled out a
+        # win for either side, so no move here makes five and the opponent has no four
+        # to play; go straight to the leaf score without a _negamax frame per move
+        leaves = depth == 1
 
         for row, col in candidates:
-            board[row][col] = current_player
+            board.make_move(row, col, ai_player)
 
-            score = self._minimax(board, self.max_depth - 1, False, alpha, beta, current_player, opponent)
+            if leaves:
+                score = -self._quiesce(board, 0, opponent, 0)
+            else:
+                # window lowered by one so a move tying the best gets an exact score
+                score = -self._negamax(board, depth - 1, -beta, 1 - alpha, opponent)
 
-            board[row][col] = 0
+            board.undo_move(row, col)
 
             if score > best_score:
                 best_score = score
-                best_move = (row, col)
+                best_moves = [(row, col)]
+            elif score == best_score:
+                best_moves.append((row, col))
 
             alpha = max(alpha, score)
 
-        return best_move if best_move else candidates[0]
+        return self._rng.choice(best_moves) if best_moves else None
 
-    def _minimax(
+    def _search_root_parallel(
         self,
-        board: List[List[int]],
+        board: Board,
+        candidates: List[Tuple[int, int]],
         depth: int,
-        is_maximizing: bool,
-        alpha: float,
-        beta: float,
         ai_player: int,
         opponent: int
-    ) -> float:
+    ) -> Optional[Tuple[int, int]]:
+        """
+        _search_root with the root moves spread over a process pool.
+
+        Young brothers wait: the first (best ordered) move is searched here
+        to get an alpha bound, then the rest are searched in parallel with
+        it. Workers also share the best root score found so far through
+        _shared_bound, so later moves search with a tighter alpha. A move
+        that can't reach its alpha comes back as a non-exact bound and is
+        never picked, so the result has the serial search's value.
+        """
+        row, col = candidates[0]
+        board.make_move(row, col, ai_player)
+        alpha = -self._negamax(board, depth - 1, -INF, INF, opponent)
+        board.undo_move(row, col)
+
+        best_score = alpha
+        best_moves = [candidates[0]]
+
+        pool = self._executor()
+        search_id, shared_alpha = self._shared_bound
+        with search_id.get_lock():
+            search_id.value += 1
+            shared_alpha.value = alpha
+            current = search_id.value
+
+        futures = [
+            pool.submit(
+                _search_root_move, self.difficulty, self.board_size, board.to_array(), move, depth, ai_player, alpha, current
+            )
+            for move in candidates[1:]
+        ]
+        for move, future in zip(candidates[1:], futures):
+            score, exact = future.result()
+            if not exact:
+                continue
+            if score > best_score:
+                best_score = score
+                best_moves = [move]
+            elif score == best_score:
+                best_moves.append(move)
+
+        return self._rng.choice(best_moves)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        """Process pool for root-parallel search, started on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # workers come from a fork server, not a fork of this process: the pool is
+                    # started from a request thread while other threads (other requests, the
+                    # log listener) run, and forking a multi-threaded process can deadlock
+                    context = multiprocessing.get_context('forkserver')
+                    # a concurrent search bumps the id, after which workers of the older one stop sharing
+                    self._shared_bound = (context.Value('q', 0), context.Value('q', -INF))
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=_init_worker,
+                        initargs=self._shared_bound
+                    )
+        return self._pool
+
+    def _board(self, board_state: Union[np.ndarray, List[List[int]]]) -> Board:
+        """Load board_state into this thread's Board instead of allocating a new one"""
+        board = getattr(self._local, 'board', None)
+        if board is None:
+            board = self._local.board = Board(board_state, self.board_size)
+        else:
+            board.load(board_state)
+        return board
+
+    def _reset_search_tables(self, board: Board) -> None:
+        """Fresh killer moves and decayed history counters for one get_move"""
+        local = self._local
+        # TT values are scored for the side to move, which is part of the key, so
+        # the table persists across requests: later moves revisit the same subtrees
+        if not hasattr(local, 'tt'):
+            tables = getattr(_transposition_tables, 'by_size', None)
+            if tables is None:
+                tables = _transposition_tables.by_size = {}
+            local.tt = tables.setdefault(board.board_size, {})
+        # two killer slots per remaining depth, moves that recently caused a cutoff there
+        local.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        # cutoff counts per player and bit index, weighted by depth squared; kept
+        # across requests (consecutive moves of a game share good cells) but halved
+        # each time so counts from older positions fade
+        history = getattr(local, 'history', None)
+        if history is None or len(history[1]) != board.board_size * board.stride:
+            local.history = [[0] * (board.board_size * board.stride) for _ in range(3)]
+        else:
+            local.history = [[count >> 1 for count in counts] for counts in history]
+        # static evaluations depend only on the position, so these outlive a single search
+        # and are shared across difficulties instead of held once per AI instance
+        if not hasattr(local, 'eval_cache'):
+            caches = getattr(_eval_caches, 'by_size', None)
+            if caches is None:
+                caches = _eval_caches.by_size = {}
+            local.eval_cache = caches.setdefault(board.board_size, {})
+
+    def _negamax(self, board: Board, depth: int, alpha: int, beta: int, player: int, null_ok: bool = True) -> int:
         """
         Args:
             board: Current board state
             depth: Remaining search depth
-            is_maximizing: True if AI's turn, False if opponent's turn
-            alpha: Best score for maximizer
-            beta: Best score for minimizer
-            ai_player: AI player number (1 or 2)
-            opponent: Opponent player number
+            alpha: Lower bound on the score for player
+            beta: Upper bound on the score for player
+            player: Player to move (1 or 2)
+            null_ok: Whether a null move may be tried here (not right after one)
 
         Returns:
-            Evaluation score
+            Evaluation score for player; the parent's score is its negation
         """
-        winner = self._check_winner(board)
-        if winner == ai_player:
-            return self.FIVE + depth * 100
-        elif winner == opponent:
-            return -self.FIVE - depth * 100
-
-        if depth == 0:
-            return self._evaluate_board(board, ai_player, opponent)
-
-        candidates = self._get_candidate_moves(board)
-        if not candidates:
-            return 0
-
-        if is_maximizing:
-            max_eval = float('-inf')
-            for row, col in candidates:
-                board[row][col] = ai_player
-                eval_score = self._minimax(board, depth - 1, False, alpha, beta, ai_player, opponent)
-                board[row][col] = 0
-
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval
+        # no check for a five by the side that just moved: get_move plays any win at
+        # the root and _search_moves returns before playing out a node where the side
+        # to move has a four, so no move that reaches here completed five
+        if depth <= 0:
+            return self._quiesce(board, depth, player)
+
+        # the same position is reached through many move orders, reuse earlier results
+        tt = self._local.tt
+        # under a canonical key, moves are stored in the canonical orientation:
+        # symmetry takes this position to it, its inverse brings a move back
+        symmetry = 0
+        if board.move_count < self.symmetry_moves:
+            key, symmetry = board.canonical_key()
         else:
-            min_eval = float('inf')
-            for row, col in candidates:
-                board[row][col] = opponent
-                eval_score = self._minimax(board, depth - 1, True, alpha, beta, ai_player, opponent)
-                board[row][col] = 0
-
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval
-
-    def _evaluate_board(self, board: List[List[int]], ai_player: int, opponent: int) -> float:
-        """Evaluate board position for AI player"""
-        ai_score = self._evaluate_player(board, ai_player)
-        opponent_score = self._evaluate_player(board, opponent)
-        return ai_score - opponent_score
-
-    def _evaluate_player(self, board: List[List[int]], player: int) -> float:
-        """Calculate score for one player based on patterns"""
-        score = 0
+            key = board.hash
+        key ^= self.tt_keys[player]
+        entry = tt.get(key)
+        tt_move = None
+        if entry is not None:
+            stored_depth, value, flag, tt_move = entry
+            if symmetry and tt_move is not None:
+                stride = board.stride
+                index = inverse_symmetry_maps(board.board_size)[symmetry][tt_move[0] * stride + tt_move[1]]
+                tt_move = divmod(index, stride)
+        if entry is not None and stored_depth >= depth:
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        value, best_move = self._search_moves(board, depth, alpha, beta, player, tt_move, null_ok)
+
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if len(tt) >= self.tt_size:
+            tt.clear()
+        if symmetry and best_move is not None:
+            stride = board.stride
+            index = symmetry_maps(board.board_size)[symmetry][best_move[0] * stride + best_move[1]]
+            best_move = divmod(index, stride)
+        tt[key] = (depth, value, flag, best_move)
+        return value
+
+    def _search_moves(
+        self,
+        board: Board,
+        depth: int,
+        alpha: int,
+        beta: int,
+        player: int,
+        tt_move: Optional[Tuple[int, int]] = None,
+        null_ok: bool = True
+    ) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """Alpha-beta over the candidate moves of an interior node, returns (value, best move)"""
+        opponent = 3 - player
+        stride = board.stride
+
+        # a four for the side to move wins on the spot, no need to search its siblings
+        wins = board.winning_cells(player)
+        if wins:
+            index = (wins & -wins).bit_length() - 1
+            return self.FIVE + (depth - 1) * 100, divmod(index, stride)
+
+        candidates = self._get_candidate_moves(board, player)
+        if not candidates:
+            return 0, None
+
+        # against an opponent's four every other move loses at once, only block
+        threats = board.winning_cells(opponent)
+        if threats:
+            candidates = [move for move in candidates if (threats >> (move[0] * stride + move[1])) & 1]
+        elif null_ok and depth - 1 - self.null_reduction >= 1:
+            # null move: let the opponent play twice in a row at reduced depth; a stone
+            # never hurts its owner, so if player still reaches beta a real move will too.
+            # The reduced search gets at least one real ply: at depth 0 it would be a
+            # static score, blind to the threat the opponent is about to play out
+            score = -self._negamax(board, depth - 1 - self.null_reduction, -beta, -beta + 1, opponent, False)
+            if score >= beta:
+                return beta, None
+        # scoring costs two pattern scans per move, more than the depth-1 leaves it would skip
+        if depth >= 2:
+            candidates = self._beam(board, player, candidates, self.beam)
+
+        # the TT move from an earlier (shallower) search of this position, then the
+        # killers at this depth, then the rest by history score
+        killers = self._local.killers[depth]
+        history = self._local.history[player]
+
+        first = []
+        for move in (tt_move, killers[0], killers[1]):
+            if move is not None and move not in first and move in candidates:
+                candidates.remove(move)
+                first.append(move)
+        candidates.sort(key=lambda move: -history[move[0] * stride + move[1]])
+        candidates[:0] = first
+
+        # at depth 1 every child is a leaf: score the siblings in this loop with the
+        # static evaluator instead of a _negamax call per leaf
+        leaves = depth == 1
+        quiesce = self._quiesce
+
+        best_score = -INF
+        best_move = None
+        for row, col in candidates:
+            board.make_move(row, col, player)
+            if leaves:
+                # player had no four above, so this move made no five; the opponent's fours
+                # are known: the ones before this move, less the cell it took
+                index = row * stride + col
+                score = -quiesce(board, 0, opponent, threats & ~(1 << index))
+            else:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, opponent)
+            board.undo_move(row, col)
 
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
+            if score > best_score:
+                best_score = score
+                best_move = (row, col)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self._record_cutoff(row, col, depth, killers, history, stride)
+                break
+        return best_score, best_move
 
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if board[row][col] != player:
-                    continue
+    def _quiesce(self, board: Board, depth: int, player: int, wins: Optional[int] = None) -> int:
+        """
+        Leaf score for player to move, played through forced four/block replies.
 
-                for dr, dc in directions:
-                    pattern_score = self._evaluate_line(board, row, col, dr, dc, player)
-                    score += pattern_score
+        A static evaluation can't tell that the side to move completes its
+        four next, or has to spend the move blocking one. Those lines are
+        followed (depth goes negative, up to quiescence_depth blocks) and
+        the quiet position at their end is evaluated. wins is player's
+        winning cells, when the caller already knows them.
 
+        Only fours are followed, not open threes: an open three at the leaf
+        that would become an open four next ply is left to the static
+        evaluation (its OPEN_THREE score); there is no stand-pat search.
+        """
+        if wins is None:
+            wins = board.winning_cells(player)
+        if wins:
+            return self.FIVE + (depth - 1) * 100
+
+        opponent = 3 - player
+        threats = board.winning_cells(opponent)
+        if not threats or depth <= -self.quiescence_depth:
+            return self._evaluate_board(board, player)
+
+        # the only move that doesn't lose at once; with two threats the other one wins next
+        index = (threats & -threats).bit_length() - 1
+        row, col = divmod(index, board.stride)
+        board.make_move(row, col, player)
+        score = -self._quiesce(board, depth - 1, opponent, threats ^ (1 << index))
+        board.undo_move(row, col)
         return score
 
-    def _evaluate_line(
-        self,
-        board: List[List[int]],
+    @staticmethod
+    def _record_cutoff(
         row: int,
         col: int,
-        dr: int,
-        dc: int,
-        player: int
-    ) -> float:
-        """Evaluate a line starting from (row, col) in direction (dr, dc)"""
-        count = 0
-        open_ends = 0
-
-        r, c = row, col
-        while 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == player:
-            count += 1
-            r += dr
-            c += dc
-
-        if 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == 0:
-            open_ends += 1
-
-        r, c = row - dr, col - dc
-        while 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == player:
-            count += 1
-            r -= dr
-            c -= dc
-
-        if 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == 0:
-            open_ends += 1
-
-        if count >= 5:
-            return self.FIVE
-        elif count == 4:
-            return self.OPEN_FOUR if open_ends == 2 else self.FOUR
-        elif count == 3:
-            return self.OPEN_THREE if open_ends == 2 else self.THREE
-        elif count == 2:
-            return self.OPEN_TWO if open_ends == 2 else self.TWO
-
-        return 0
-
-    def _find_winning_move(self, board: List[List[int]], player: int) -> Optional[Tuple[int, int]]:
-        """Find immediate winning move (completes 5 in a row)"""
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if board[row][col] == 0:
-                    board[row][col] = player
-                    if self._check_winner(board) == player:
-                        board[row][col] = 0
-                        return (row, col)
-                    board[row][col] = 0
-        return None
-
-    def _check_winner(self, board: List[List[int]]) -> Optional[int]:
-        """Check if there's a winner (5 in a row). Returns player number or None."""
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if board[row][col] == 0:
-                    continue
-
-                player = board[row][col]
-
-                for dr, dc in directions:
-                    count = 1
-
-                    r, c = row + dr, col + dc
-                    while 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == player:
-                        count += 1
-                        r += dr
-                        c += dc
-
-                    r, c = row - dr, col - dc
-                    while 0 <= r < self.board_size and 0 <= c < self.board_size and board[r][c] == player:
-                        count += 1
-                        r -= dr
-                        c -= dc
-
-                    if count >= 5:
-                        return player
-
-        return None
-
-    def _get_candidate_moves(self, board: List[List[int]], radius: int = 2) -> List[Tuple[int, int]]:
+        depth: int,
+        killers: List[Optional[Tuple[int, int]]],
+        history: List[int],
+        stride: int
+    ) -> None:
+        """Remember a move that caused a beta cutoff for killer and history ordering"""
+        move = (row, col)
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history[row * stride + col] += depth * depth
+
+    def _evaluate_board(self, board: Board, ai_player: int) -> int:
+        """Evaluate board position for AI player"""
+        # cached as player 1's score by Zobrist hash; player 2's is its negation
+        cache = self._local.eval_cache
+        score = cache.get(board.hash)
+        if score is None:
+            empty = board.valid & ~board.occupied()
+            score = self._evaluate_player(board, 1, empty) - self._evaluate_player(board, 2, empty)
+            if len(cache) >= self.eval_cache_size:
+                del cache[next(iter(cache))]  # FIFO eviction
+            cache[board.hash] = score
+        return score if ai_player == 1 else -score
+
+    def _evaluate_player(self, board: Board, player: int, empty: Optional[int] = None) -> int:
+        """
+        Calculate score for one player based on patterns.
+
+        Every stone scores the run it sits in along each of the 4 directions,
+        so a run of length 2-4 adds length * its pattern score (open if both
+        ends are empty) and each stone of a 5+ run adds FIVE. Runs are found
+        with bitboard shifts, a handful of int operations per direction.
+        """
+        if empty is None:
+            empty = board.valid & ~board.occupied()
+        return self._pattern_score(board.bits[player], empty, board.shifts)
+
+    def _pattern_score(self, bits: int, empty: int, shifts: Tuple[int, ...]) -> int:
+        """Pattern score of the stones in bits, given the empty cells, see _evaluate_player"""
+        score = 0
+
+        # hot path (every leaf): per-length weights (length * pattern score) come
+        # from the table built in __init__, bound to locals, length checks unrolled
+        open_2, blocked_2, open_3, blocked_3, open_4, blocked_4 = self.run_weights
+
+        for s in shifts:
+            # first stone of every run, and those with an empty cell just before them
+            starts = bits & ~(bits << s)
+            open_starts = starts & (empty << s)
+
+            # runs of length >= 2, 3, 4, 5, marked at their first stone
+            at_least_2 = starts & (bits >> s)
+            if not at_least_2:
+                continue
+            at_least_3 = at_least_2 & (bits >> (2 * s))
+            at_least_4 = at_least_3 & (bits >> (3 * s))
+            at_least_5 = at_least_4 & (bits >> (4 * s))
+
+            # runs of exactly 2, 3, 4; open if the cell past the end is empty too
+            exact = at_least_2 ^ at_least_3
+            if exact:
+                both_open = (exact & open_starts & (empty >> (2 * s))).bit_count()
+                score += open_2 * both_open + blocked_2 * (exact.bit_count() - both_open)
+            exact = at_least_3 ^ at_least_4
+            if exact:
+                both_open = (exact & open_starts & (empty >> (3 * s))).bit_count()
+                score += open_3 * both_open + blocked_3 * (exact.bit_count() - both_open)
+            exact = at_least_4 ^ at_least_5
+            if exact:
+                both_open = (exact & open_starts & (empty >> (4 * s))).bit_count()
+                score += open_4 * both_open + blocked_4 * (exact.bit_count() - both_open)
+
+            if at_least_5:
+                # grow the 5+ run starts along the line to cover all their stones
+                stones = at_least_5
+                while True:
+                    grown = stones | ((stones << s) & bits)
+                    if grown == stones:
+                        break
+                    stones = grown
+                score += self.FIVE * stones.bit_count()
+
+        return score
+
+    def _beam(self, board: Board, player: int, candidates: List[Tuple[int, int]], width: int) -> List[Tuple[int, int]]:
+        """
+        Keep the width candidates with the best one-ply static score: player's
+        pattern score after playing there plus 0.8x the opponent's had they
+        played there (the value of blocking it). Making or blocking a four
+        scores far above anything else, so forcing moves survive the cut.
+        """
+        if len(candidates) <= width:
+            return candidates
+
+        own = board.bits[player]
+        other = board.bits[3 - player]
+        empty = board.valid & ~board.occupied()
+        stride = board.stride
+        shifts = board.shifts
+        pattern_score = self._pattern_score
+
+        # the totals differ between cells only by the new stone, so ranking
+        # them ranks the per-move deltas; weights 5:4 keep it in ints
+        scores = []
+        for row, col in candidates:
+            cell = 1 << (row * stride + col)
+            rest = empty ^ cell
+            scores.append(5 * pattern_score(own | cell, rest, shifts) + 4 * pattern_score(other | cell, rest, shifts))
+
+        # stable sort: equal scores keep the proximity/center order
+        order = sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)
+        return [candidates[i] for i in order[:width]]
+
+    def _find_winning_move(self, board: Board, player: int) -> Optional[Tuple[int, int]]:
+        """Find immediate winning move (completes 5 in a row), the first in row-major order"""
+        cells = board.winning_cells(player)
+        if not cells:
+            return None
+        # lowest bit index is the first cell in row-major order
+        return divmod((cells & -cells).bit_length() - 1, board.stride)
+
+    def _get_candidate_moves(self, board: Board, player: int) -> List[Tuple[int, int]]:
         """
         Get candidate moves (empty positions near existing stones).
-        Only consider positions within 'radius' of existing stones for efficiency.
+        Only consider positions within 2 cells of existing stones for efficiency.
+
+        Moves next to the opponent's stones come first, then moves closer to
+        the center, so alpha-beta sees the likely best replies early.
         """
-        candidates = set()
-        has_stones = False
-
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if board[row][col] != 0:
-                    has_stones = True
-                    for dr in range(-radius, radius + 1):
-                        for dc in range(-radius, radius + 1):
-                            r, c = row + dr, col + dc
-                            if (0 <= r < self.board_size and
-                                0 <= c < self.board_size and
-                                board[r][c] == 0):
-                                candidates.add((r, c))
-
-        if not has_stones:
-            center = self.board_size // 2
-            for dr in range(-1, 2):
-                for dc in range(-1, 2):
-                    candidates.add((center + dr, center + dc))
-
-        return list(candidates)
+        occupied = board.occupied()
+        center = self.board_size // 2
+
+        if not occupied:
+            return [(center + dr, center + dc) for dr in range(-1, 2) for dc in range(-1, 2)]
+
+        # neighborhoods are maintained incrementally by make_move/undo_move
+        candidates = board.near & ~occupied
+        far = candidates & ~board.adjacent[3 - player]
+
+        # unpack both bitboards into per-bit arrays instead of looping over set bits
+        # in Python; cells not next to the opponent get ranks offset past the rest
+        count = len(self.rank_array)
+        size = (count + 7) // 8
+        is_candidate = np.unpackbits(
+            np.frombuffer(candidates.to_bytes(size, 'little'), dtype=np.uint8), count=count, bitorder='little'
+        )
+        is_far = np.unpackbits(
+            np.frombuffer(far.to_bytes(size, 'little'), dtype=np.uint8), count=count, bitorder='little'
+        )
+        ranks = (self.rank_array + is_far * np.int32(count))[is_candidate.view(np.bool_)]
+        ranks.sort()
+
+        ranked_twice = self.ranked_twice
+        return [ranked_twice[rank] for rank in ranks.tolist()]
 
 
 if __name__ == "__main__":
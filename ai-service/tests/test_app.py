@@ -0,0 +1,173 @@
+"""
+Request validation of the /api/move/ endpoint, through Flask's test client,
+and the app's queued logging.
+
+Run from ai-service: python -m pytest tests
+"""
+
+import base64
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app
+
+SIZE = 15
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def empty_board():
+    return [[0] * SIZE for _ in range(SIZE)]
+
+
+def post_move(client, payload):
+    # stdlib json, so values orjson refuses to encode (ints past 64 bits) can still be sent
+    return client.post('/api/move/', data=json.dumps(payload), content_type='application/json')
+
+
+def test_valid_board(client):
+    board = empty_board()
+    board[7][7] = 1
+
+    response = post_move(client, {'board_state': board, 'current_player': 2})
+
+    assert response.status_code == 200
+    move = response.get_json()
+    assert board[move['row']][move['col']] == 0
+
+
+@pytest.mark.parametrize('cell', [257, -254, 2 ** 64, -1, 3, 1.0, 1.5, True, False, None, '1'])
+def test_invalid_cell_rejected(client, cell):
+    board = empty_board()
+    board[7][7] = 1
+    board[0][0] = cell
+
+    response = post_move(client, {'board_state': board, 'current_player': 2})
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('board', [
+    [[0] * SIZE for _ in range(SIZE - 1)],
+    [[0] * (SIZE + 1) for _ in range(SIZE)],
+    [[0] * SIZE for _ in range(SIZE - 1)] + [[0] * (SIZE - 1)],
+    'not a board',
+])
+def test_wrong_shape_rejected(client, board):
+    response = post_move(client, {'board_state': board, 'current_player': 2})
+
+    assert response.status_code == 400
+
+
+def encode_board(cells):
+    return base64.b64encode(bytes(cell & 0xFF for row in cells for cell in row)).decode()
+
+
+def test_b64_board(client):
+    board = empty_board()
+    board[7][7] = 1
+
+    response = post_move(client, {'board_state_b64': encode_board(board), 'current_player': 2})
+
+    assert response.status_code == 200
+    move = response.get_json()
+    assert board[move['row']][move['col']] == 0
+
+
+@pytest.mark.parametrize('encoded', [
+    'not base64!',
+    base64.b64encode(bytes(SIZE * SIZE - 1)).decode(),
+    base64.b64encode(bytes(SIZE * SIZE + 1)).decode(),
+    '',
+    12345,
+])
+def test_b64_malformed_rejected(client, encoded):
+    response = post_move(client, {'board_state_b64': encoded, 'current_player': 2})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('cell', [3, 255, -1, 0x7F])
+def test_b64_out_of_range_rejected(client, cell):
+    board = empty_board()
+    board[0][0] = cell
+
+    response = post_move(client, {'board_state_b64': encode_board(board), 'current_player': 2})
+
+    assert response.status_code == 400
+
+
+def test_finished_game_rejected(client):
+    board = empty_board()
+    for col in range(3, 8):
+        board[7][col] = 1
+    for col in range(3, 7):
+        board[8][col] = 2
+
+    response = post_move(client, {'board_state': board, 'current_player': 2})
+
+    assert response.status_code == 400
+    assert 'already over' in response.get_json()['error']
+
+
+def test_full_board_rejected(client):
+    board = [[1 + (col // 2 + row) % 2 for col in range(SIZE)] for row in range(SIZE)]
+
+    response = post_move(client, {'board_state': board, 'current_player': 1})
+
+    assert response.status_code == 400
+    assert 'full' in response.get_json()['error']
+
+
+
+@pytest.mark.parametrize('args, kwargs, expected', [
+    ((), {}, None),
+    ((1,), {}, 1),
+    ((1, 2), {}, [1, 2]),
+    ((), {'row': 7}, {'row': 7}),
+])
+def test_json_response_arguments(args, kwargs, expected):
+    with app.app_context():
+        response = app.json.response(*args, **kwargs)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == expected
+
+
+def test_json_response_rejects_args_and_kwargs():
+    with app.app_context(), pytest.raises(TypeError):
+        app.json.response(1, row=7)
+
+
+LOG_SCRIPT = """
+import os
+from app import app
+app.logger.warning('before fork')
+pid = os.fork()
+if pid == 0:
+    app.logger.warning('in child')
+    raise SystemExit(0)
+os.waitpid(pid, 0)
+app.logger.warning('at exit')
+"""
+
+
+def test_log_records_written_by_exit():
+    # the listener thread is restarted in a forked child and flushed at exit, so
+    # no record queued just before a process ends is lost
+    result = subprocess.run(
+        [sys.executable, '-c', LOG_SCRIPT], cwd=os.path.join(os.path.dirname(__file__), '..'),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0
+    for message in ('before fork', 'in child', 'at exit'):
+        assert result.stderr.count(message) == 1
@@ -0,0 +1,178 @@
+"""
+Bitboard engine checks against brute-force per-cell scans.
+
+Run from ai-service: python -m pytest tests
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'model-inference'))
+
+from minimax_ai.board import Board, inverse_symmetry_maps, symmetry_maps
+from minimax_ai.gomoku_minimax import GomokuMinimaxAI
+
+SIZE = 15
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def random_boards(count, seed):
+    """Boards of varied density, dense enough that some hold fours and fives"""
+    rng = np.random.default_rng(seed)
+    boards = []
+    for _ in range(count):
+        density = rng.uniform(0.05, 0.6)
+        cells = rng.choice(3, size=(SIZE, SIZE), p=[1 - density, density / 2, density / 2])
+        boards.append(cells.astype(np.int8))
+    return boards
+
+
+def run_through(cells, row, col, dr, dc, player):
+    """Length of player's run through (row, col) along (dr, dc), and its empty ends"""
+    count = 0
+    open_ends = 0
+    for sign in (1, -1):
+        r, c = row + sign * dr, col + sign * dc
+        while 0 <= r < SIZE and 0 <= c < SIZE and cells[r][c] == player:
+            count += 1
+            r += sign * dr
+            c += sign * dc
+        if 0 <= r < SIZE and 0 <= c < SIZE and cells[r][c] == 0:
+            open_ends += 1
+    return count + 1, open_ends
+
+
+def brute_five(cells, player):
+    return any(
+        run_through(cells, row, col, dr, dc, player)[0] >= 5
+        for row in range(SIZE) for col in range(SIZE) if cells[row][col] == player
+        for dr, dc in DIRECTIONS
+    )
+
+
+def brute_winning_cells(cells, player):
+    return {
+        (row, col) for row in range(SIZE) for col in range(SIZE)
+        if cells[row][col] == 0
+        and any(run_through(cells, row, col, dr, dc, player)[0] >= 5 for dr, dc in DIRECTIONS)
+    }
+
+
+def brute_evaluate(ai, cells, player):
+    """The original per-stone scan: each stone scores its run along every direction"""
+    scores = {4: (ai.OPEN_FOUR, ai.FOUR), 3: (ai.OPEN_THREE, ai.THREE), 2: (ai.OPEN_TWO, ai.TWO)}
+    score = 0
+    for row in range(SIZE):
+        for col in range(SIZE):
+            if cells[row][col] != player:
+                continue
+            for dr, dc in DIRECTIONS:
+                count, open_ends = run_through(cells, row, col, dr, dc, player)
+                if count >= 5:
+                    score += ai.FIVE
+                elif count >= 2:
+                    open_score, blocked_score = scores[count]
+                    score += open_score if open_ends == 2 else blocked_score
+    return score
+
+
+def positions(bits, stride):
+    result = set()
+    while bits:
+        low = bits & -bits
+        result.add(divmod(low.bit_length() - 1, stride))
+        bits ^= low
+    return result
+
+
+@pytest.mark.parametrize('cells', random_boards(300, seed=1))
+def test_check_win(cells):
+    board = Board(cells)
+    for player in (1, 2):
+        assert board.check_win(player) == brute_five(cells.tolist(), player)
+
+
+@pytest.mark.parametrize('cells', random_boards(300, seed=2))
+def test_winning_cells(cells):
+    board = Board(cells)
+    for player in (1, 2):
+        found = positions(board.winning_cells(player), board.stride)
+        assert found == brute_winning_cells(cells.tolist(), player)
+
+
+@pytest.mark.parametrize('cells', random_boards(300, seed=3))
+def test_evaluate_player(cells):
+    ai = GomokuMinimaxAI('medium')
+    board = Board(cells)
+    for player in (1, 2):
+        assert ai._evaluate_player(board, player) == brute_evaluate(ai, cells.tolist(), player)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_make_undo_matches_fresh_board(seed):
+    rng = random.Random(seed)
+    board = Board()
+    cells = np.zeros((SIZE, SIZE), dtype=np.int8)
+    played = []
+    empty = [(row, col) for row in range(SIZE) for col in range(SIZE)]
+    rng.shuffle(empty)
+
+    def check():
+        fresh = Board(cells)
+        assert board.hash == fresh.hash
+        assert board.near == fresh.near
+        assert board.adjacent == fresh.adjacent
+        assert board.bits == fresh.bits
+        assert board.move_count == fresh.move_count
+
+    for _ in range(rng.randrange(10, 60)):
+        if played and rng.random() < 0.3:
+            row, col = played.pop()
+            board.undo_move(row, col)
+            cells[row, col] = 0
+            empty.append((row, col))
+        else:
+            row, col = empty.pop()
+            player = rng.choice((1, 2))
+            board.make_move(row, col, player)
+            cells[row, col] = player
+            played.append((row, col))
+        check()
+
+    while played:
+        row, col = played.pop()
+        board.undo_move(row, col)
+        cells[row, col] = 0
+        check()
+    assert board.hash == 0
+
+
+@pytest.mark.parametrize('cells', random_boards(50, seed=4))
+def test_canonical_hash_symmetric_variants(cells):
+    variants = []
+    for flipped in (cells, np.fliplr(cells)):
+        for turns in range(4):
+            variants.append(np.rot90(flipped, turns))
+
+    hashes = {Board(variant).canonical_hash() for variant in variants}
+    assert len(hashes) == 1
+
+
+@pytest.mark.parametrize('cells', random_boards(50, seed=5))
+def test_canonical_key_symmetry(cells):
+    board = Board(cells)
+    key, symmetry = board.canonical_key()
+    mapping = symmetry_maps(SIZE)[symmetry]
+    inverse = inverse_symmetry_maps(SIZE)[symmetry]
+
+    canonical = np.zeros_like(cells)
+    for row in range(SIZE):
+        for col in range(SIZE):
+            index = mapping[row * board.stride + col]
+            canonical[divmod(index, board.stride)] = cells[row, col]
+            assert inverse[index] == row * board.stride + col
+    assert Board(canonical).hash == key
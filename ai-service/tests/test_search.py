@@ -0,0 +1,269 @@
+"""
+Move choice of GomokuMinimaxAI on hand-built positions.
+
+Run from ai-service: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'model-inference'))
+
+from minimax_ai.board import Board
+from minimax_ai.gomoku_minimax import INF, GomokuMinimaxAI
+
+SIZE = 15
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+
+
+def empty_board():
+    return [[0] * SIZE for _ in range(SIZE)]
+
+
+def full_board():
+    """A full board with no five: pairs of columns alternate, shifted one per row"""
+    return [[1 + (col // 2 + row) % 2 for col in range(SIZE)] for row in range(SIZE)]
+
+
+def finished_board():
+    board = empty_board()
+    for col in range(3, 8):
+        board[7][col] = 1
+    for col in range(3, 7):
+        board[8][col] = 2
+    return board
+
+
+@pytest.mark.parametrize('difficulty', DIFFICULTIES)
+def test_finished_game_rejected(difficulty):
+    with pytest.raises(ValueError, match='already over'):
+        GomokuMinimaxAI(difficulty).get_move(finished_board(), 2)
+
+
+@pytest.mark.parametrize('difficulty', DIFFICULTIES)
+def test_full_board_rejected(difficulty):
+    with pytest.raises(ValueError, match='full'):
+        GomokuMinimaxAI(difficulty).get_move(full_board(), 1)
+
+
+def refuted_four_board():
+    """
+    White can make a four at (7, 7), but black's forced block at (7, 8)
+    is a double four (column 8 and the diagonal down to (10, 11)).
+    (7, 8) itself both takes that point and makes white a split four.
+    """
+    board = empty_board()
+    board[7][3] = 1
+    for col in (4, 5, 6):
+        board[7][col] = 2
+    for row in (4, 5, 6):
+        board[row][8] = 1
+    for row, col in ((8, 9), (9, 10), (10, 11)):
+        board[row][col] = 1
+    for row, col in ((11, 3), (12, 4), (11, 5)):
+        board[row][col] = 2
+    return board
+
+
+def test_quiescence_sees_refuted_four():
+    # easy searches one ply: only the quiescence extension plays out black's block
+    static = GomokuMinimaxAI('easy', seed=0)
+    static.quiescence_depth = 0
+    assert static.get_move(refuted_four_board(), 2) == (7, 7)
+
+    assert GomokuMinimaxAI('easy', seed=0).get_move(refuted_four_board(), 2) == (7, 8)
+
+
+def open_three_board():
+    """
+    Black has an open three on row 7 and will make an open four. White's
+    stones are 2x2 squares: they lead the static score but threaten nothing.
+    """
+    board = empty_board()
+    for col in (5, 6, 7):
+        board[7][col] = 1
+    for top, left in ((1, 1), (1, 6), (1, 11), (12, 1), (12, 6), (12, 11)):
+        for row in (top, top + 1):
+            for col in (left, left + 1):
+                board[row][col] = 2
+    return board
+
+
+@pytest.mark.parametrize('depth', [3, 4])
+def test_null_move_keeps_forced_loss(depth):
+    # white ignoring the three loses; a null move must not pass for a real move and
+    # cut on the static lead after it, so the search fails low against beta = 0
+    ai = GomokuMinimaxAI('expert', seed=0)
+    board = ai._board(open_three_board())
+    ai._reset_search_tables(board)
+
+    assert ai._negamax(board, depth, -1, 0, 2) < 0
+    assert ai._negamax(board, depth, -INF, INF, 2) < -ai.OPEN_FOUR
+
+
+
+def board_with(stones):
+    board = empty_board()
+    for row, col, player in stones:
+        board[row][col] = player
+    return board
+
+
+def transforms(cells):
+    """The 8 rotations and reflections of a 2D array"""
+    for flipped in (cells, np.fliplr(cells)):
+        for turns in range(4):
+            yield np.rot90(flipped, turns)
+
+
+def images(move, board):
+    """move and its images under every symmetry that leaves board unchanged"""
+    cells = np.array(board)
+    marked = np.zeros_like(cells)
+    marked[move] = 1
+    return {
+        tuple(int(i) for i in np.argwhere(marked_image)[0])
+        for image, marked_image in zip(transforms(cells), transforms(marked))
+        if (image == cells).all()
+    }
+
+
+SYMMETRIC_BOARDS = [
+    board_with([(7, 7, 1)]),
+    board_with([(7, 7, 1), (7, 8, 2)]),
+    board_with([(7, 7, 1), (6, 6, 2), (8, 8, 2), (7, 6, 1)]),
+]
+
+
+@pytest.mark.parametrize('difficulty', ['easy', 'medium'])
+@pytest.mark.parametrize('board', SYMMETRIC_BOARDS)
+def test_symmetric_moves_cover_every_image(difficulty, board):
+    # the root keeps one move per symmetry class and plays it through a random symmetry
+    moves = {GomokuMinimaxAI(difficulty, seed=seed).get_move(board, 2) for seed in range(100)}
+
+    for move in moves:
+        assert images(move, board) <= moves
+
+
+@pytest.mark.parametrize('difficulty', DIFFICULTIES)
+@pytest.mark.parametrize('board', SYMMETRIC_BOARDS)
+def test_symmetric_moves_are_empty_cells(difficulty, board):
+    for seed in range(10):
+        row, col = GomokuMinimaxAI(difficulty, seed=seed).get_move(board, 2)
+        assert 0 <= row < SIZE and 0 <= col < SIZE
+        assert board[row][col] == 0
+
+
+def test_tt_move_follows_symmetric_variant(monkeypatch):
+    # all 8 variants share one canonical TT entry; its move must come back as
+    # the image of the move found on the first variant, on that variant's board
+    board = board_with([(7, 7, 1), (7, 8, 2), (8, 6, 1), (5, 9, 2)])
+    ai = GomokuMinimaxAI('medium', seed=0)
+    first = ai._board(board)
+    ai._reset_search_tables(first)
+    ai._negamax(first, 1, -INF, INF, 1)
+    # a deeper probe of each variant against the depth-1 table reaches the TT move
+    stored = dict(ai._local.tt)
+
+    probed = []
+    search_moves = ai._search_moves
+
+    def record(board, depth, alpha, beta, player, tt_move=None, null_ok=True):
+        if not probed:
+            probed.append(tt_move)
+        return search_moves(board, depth, alpha, beta, player, tt_move, null_ok)
+
+    monkeypatch.setattr(ai, '_search_moves', record)
+    ai._local.tt = dict(stored)
+    ai._negamax(first, 2, -INF, INF, 1)
+    assert probed[0] is not None
+    marked = np.zeros((SIZE, SIZE), dtype=np.int8)
+    marked[probed[0]] = 1
+    for variant, marked_variant in zip(transforms(np.array(board)), transforms(marked)):
+        probed.clear()
+        ai._local.tt = dict(stored)
+        ai._negamax(ai._board(variant.tolist()), 2, -INF, INF, 1)
+        move = tuple(int(i) for i in np.argwhere(marked_variant)[0])
+        assert probed == [move]
+        assert variant[move] == 0
+
+
+def test_same_seed_same_moves():
+    def play(seed):
+        ai = GomokuMinimaxAI('medium', seed=seed)
+        board = empty_board()
+        moves = []
+        for ply in range(10):
+            player = 1 + ply % 2
+            row, col = ai.get_move(board, player)
+            board[row][col] = player
+            moves.append((row, col))
+        return moves
+
+    assert play(7) == play(7)
+
+
+def test_equal_scores_all_reachable():
+    # no symmetry here, so ties come only from equal scores; easy's depth-1 root
+    # scores each move as a leaf, the same way this test does
+    board = board_with([(7, 7, 1), (7, 8, 2), (9, 5, 1)])
+    ai = GomokuMinimaxAI('easy', seed=0)
+    position = ai._board(board)
+    ai._reset_search_tables(position)
+    candidates = ai._beam(position, 2, ai._get_candidate_moves(position, 2), ai.root_beam)
+    scores = {}
+    for row, col in candidates:
+        position.make_move(row, col, 2)
+        scores[(row, col)] = -ai._quiesce(position, 0, 1, 0)
+        position.undo_move(row, col)
+    best = max(scores.values())
+    tied = {move for move, score in scores.items() if score == best}
+
+    moves = {GomokuMinimaxAI('easy', seed=seed).get_move(board, 2) for seed in range(40)}
+
+    assert len(tied) > 1
+    assert moves == tied
+
+
+def midgame_boards(count, seed):
+    """Positions of 6-15 stones around the center, alternating colours, none finished"""
+    rng = np.random.default_rng(seed)
+    cells = [(row, col) for row in range(4, 11) for col in range(4, 11)]
+    boards = []
+    while len(boards) < count:
+        order = rng.permutation(len(cells))[:rng.integers(6, 16)]
+        board = empty_board()
+        for i, index in enumerate(order):
+            row, col = cells[index]
+            board[row][col] = 1 + i % 2
+        if Board(board).winner() is None:
+            boards.append(board)
+    return boards
+
+
+def test_root_parallel_matches_serial():
+    # same as the app's AI_ROOT_WORKERS=2: expert root moves spread over two processes
+    serial = GomokuMinimaxAI('expert', seed=0)
+    parallel = GomokuMinimaxAI('expert', workers=2, seed=0)
+    try:
+        for board in midgame_boards(8, seed=5):
+            assert parallel.get_move(board, 2) == serial.get_move(board, 2)
+        assert parallel._pool is not None
+    finally:
+        if parallel._pool is not None:
+            parallel._pool.shutdown()
+
+
+def test_difficulties_share_one_tt():
+    # one table per thread bounds memory; salted keys keep each AI to its own entries
+    board = midgame_boards(1, seed=7)[0]
+    easy, hard = GomokuMinimaxAI('easy', seed=0), GomokuMinimaxAI('hard', seed=0)
+    easy.get_move(board, 2)
+    easy_entries = dict(easy._local.tt)
+    hard.get_move(board, 2)
+
+    assert hard._local.tt is easy._local.tt
+    assert all(hard._local.tt[key] == entry for key, entry in easy_entries.items())